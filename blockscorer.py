@@ -0,0 +1,328 @@
+import re
+from html.parser import HTMLParser
+
+# Elements that never hold main content; their text is dropped during the pass
+SKIP_TAGS = {"head", "script", "style", "noscript", "template", "svg", "canvas",
+             "nav", "header", "footer", "aside", "form", "button", "select",
+             "iframe", "object"}
+
+# Elements without an end tag, never pushed onto the node stack
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+             "meta", "param", "source", "track", "wbr"}
+
+# Inline elements: their text counts towards the enclosing block
+INLINE_TAGS = {"a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em",
+               "font", "i", "kbd", "label", "mark", "q", "s", "samp", "small",
+               "span", "strong", "sub", "sup", "time", "u", "var"}
+
+# Blocks whose text scores for their parent; text directly in other blocks (div,
+# section, ...) scores for the block itself, as if it were wrapped in a <p>
+PARAGRAPH_TAGS = {"p", "pre", "blockquote", "li", "dd", "dt", "td", "th",
+                  "h1", "h2", "h3", "h4", "h5", "h6"}
+
+# Start tags that implicitly close an open element (HTML optional end tags)
+AUTO_CLOSE = {
+    "p": {"address", "article", "aside", "blockquote", "div", "dl", "fieldset",
+          "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+          "hr", "main", "nav", "ol", "p", "pre", "section", "table", "ul"},
+    "option": {"option"},
+}
+
+# Start tags that close the nearest open element of the same kind, even when other
+# elements are still open inside it, unless a scope boundary comes first:
+# tag -> (elements it closes, scope boundaries)
+SCOPED_AUTO_CLOSE = {
+    "li": ({"li"}, {"ul", "ol", "menu"}),
+    "dt": ({"dt", "dd"}, {"dl"}),
+    "dd": ({"dt", "dd"}, {"dl"}),
+    "tr": ({"tr"}, {"table", "thead", "tbody", "tfoot"}),
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+}
+
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|post|story|text|blog", re.I)
+NEGATIVE_HINTS = re.compile(r"comment|footer|sidebar|menu|nav|related|share|social|sponsor"
+                            r"|promo|banner|cookie|popup|widget|breadcrumb|masthead|^ad-|-ad$",
+                            re.I)
+
+MIN_BLOCK_CHARS = 25    # blocks with less text than this are not scored
+HINT_WEIGHT = 25        # bonus/penalty for class/id hints and <main>/<article>
+LANGUAGE_SAMPLE = 4000  # number of words used for language detection
+
+STOPWORDS = {
+    "en": {"the", "and", "of", "to", "is", "that", "with", "for", "this", "are",
+           "was", "have", "from", "which", "not", "but", "they", "be", "by", "it"},
+    "de": {"der", "die", "und", "das", "ist", "nicht", "mit", "sich", "auf", "den",
+           "ein", "eine", "auch", "dem", "wird", "sind", "von", "zu", "für", "werden"},
+    "fr": {"le", "la", "les", "et", "des", "est", "une", "dans", "que", "pour",
+           "qui", "pas", "sur", "avec", "du", "au", "ce", "sont", "il", "nous"},
+    "es": {"el", "los", "las", "y", "que", "una", "por", "con", "para", "es",
+           "del", "como", "más", "pero", "su", "se", "lo", "al", "está", "son"},
+    "it": {"il", "di", "che", "è", "della", "per", "una", "sono", "non", "gli",
+           "con", "del", "le", "nel", "alla", "anche", "come", "più", "questo", "ed"},
+    "nl": {"de", "het", "een", "en", "van", "is", "dat", "niet", "met", "zijn",
+           "voor", "op", "ook", "wordt", "aan", "bij", "maar", "er", "naar", "dit"},
+    "pt": {"o", "os", "e", "do", "da", "não", "uma", "com", "para", "que",
+           "dos", "das", "em", "mais", "como", "mas", "foi", "ao", "são", "também"},
+}
+
+# word -> languages it is a stopword in, so each word is looked up once
+STOPWORD_LANGUAGES = {}
+for _lang, _words in STOPWORDS.items():
+    for _word in _words:
+        STOPWORD_LANGUAGES.setdefault(_word, []).append(_lang)
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+HAN_RE = re.compile("[\u4e00-\u9fff]")
+KANA_RE = re.compile("[\u3040-\u30ff]")
+HANGUL_RE = re.compile("[\uac00-\ud7af]")
+CYRILLIC_RE = re.compile("[\u0400-\u04ff]")
+ARABIC_RE = re.compile("[\u0600-\u06ff]")
+
+
+class BlockNode:
+    """Per element statistics, filled in bottom-up as elements are closed"""
+    __slots__ = ("tag", "parent", "block", "skipped", "weight", "chars", "link_chars",
+                 "tags", "own_chars", "own_link_chars", "own_commas", "score",
+                 "seg_start", "seg_end", "boilerplate")
+
+    def __init__(self, tag, parent, skipped=False, weight=0, seg_start=0):
+        self.tag = tag
+        self.parent = parent
+        # inline elements report their text to the nearest enclosing block
+        self.block = parent.block if tag in INLINE_TAGS and parent is not None else self
+        self.skipped = skipped
+        self.weight = weight
+        self.chars = 0
+        self.link_chars = 0
+        self.tags = 1
+        self.own_chars = 0
+        self.own_link_chars = 0
+        self.own_commas = 0
+        self.score = 0.0
+        self.seg_start = seg_start
+        self.seg_end = seg_start
+        # inside a container with negative class/id hints: text here never scores
+        self.boilerplate = weight < 0 or (parent is not None and parent.boilerplate)
+
+    @property
+    def link_density(self) -> float:
+        """Share of the text in this subtree that is link text"""
+        return self.link_chars / self.chars if self.chars else 0.0
+
+
+class ExtractedContent:
+    """Result of a block scoring pass"""
+    def __init__(self, text: str, language: str | None = None,
+                 declared_language: str | None = None, tag: str | None = None,
+                 score: float = 0.0):
+        self.text = text
+        self.language = language
+        self.declared_language = declared_language
+        self.tag = tag
+        self.score = score
+
+    def __repr__(self) -> str:
+        return (f"ExtractedContent(tag={self.tag!r}, score={self.score:.1f}, "
+                f"language={self.language!r}, text_length={len(self.text)})")
+
+
+class BlockScorer(HTMLParser):
+    """Single pass text-density/link-density scorer to find the main content block
+
+    Statistics (text length, link text length, tag count, paragraph scores) are
+    collected per element and rolled up into the parent when the element is closed,
+    so every element is scored exactly once, right after its subtree is complete.
+    Word statistics for language detection are gathered from the same text events.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+    def reset(self) -> None:
+        """Reset the parser so the instance can be reused for another document"""
+        super().reset()
+        self.root = BlockNode("#root", None)
+        self.stack = [self.root]
+        self.segments = []
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.best = None
+        self.best_score = 0.0
+        self.declared_language = None
+        self.word_count = 0
+        self.stopword_hits = dict.fromkeys(STOPWORDS, 0)
+        self.script_chars = {"ja": 0, "ko": 0, "zh": 0, "ru": 0, "ar": 0}
+
+    @staticmethod
+    def _is_hidden(attrs: dict) -> bool:
+        """Check for hidden elements, see htmlcleaner.removables"""
+        style = (attrs.get("style") or "").replace(" ", "").lower()
+        return ("hidden" in attrs
+                or "display:none" in style
+                or (attrs.get("aria-hidden") or "").lower() == "true"
+                or (attrs.get("role") or "").lower() == "navigation")
+
+    @staticmethod
+    def _weight(tag: str, attrs: dict) -> int:
+        """Class/id based weight of an element, <html> and <body> classes are ignored"""
+        if tag in ("html", "body"):
+            return 0
+        weight = HINT_WEIGHT if tag in ("main", "article") else 0
+        hints = f"{attrs.get('class') or ''} {attrs.get('id') or ''}".strip()
+        if hints:
+            if NEGATIVE_HINTS.search(hints):
+                weight -= HINT_WEIGHT
+            if POSITIVE_HINTS.search(hints):
+                weight += HINT_WEIGHT
+        return weight
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        """Open a node, closing elements whose end tag is optional"""
+        tag = tag.lower()
+        top = self.stack[-1]
+        if top.tag in AUTO_CLOSE and tag in AUTO_CLOSE[top.tag]:
+            self._close(top)
+        if tag in SCOPED_AUTO_CLOSE:
+            closes, scope = SCOPED_AUTO_CLOSE[tag]
+            for i in range(len(self.stack) - 1, 0, -1):
+                if self.stack[i].tag in closes:
+                    while len(self.stack) > i:
+                        self._close(self.stack[-1])
+                    break
+                if self.stack[i].tag in scope:
+                    break
+        top = self.stack[-1]
+        attrs_dict = {k.lower(): v for k, v in attrs}
+        if tag == "html" and attrs_dict.get("lang"):
+            self.declared_language = attrs_dict["lang"].split("-")[0].lower()
+        if tag in VOID_TAGS:
+            return
+        skipped = tag in SKIP_TAGS or BlockScorer._is_hidden(attrs_dict)
+        if tag == "header" and top.tag in ("article", "main"):
+            skipped = False
+        node = BlockNode(tag, top, skipped=skipped, weight=BlockScorer._weight(tag, attrs_dict),
+                         seg_start=len(self.segments))
+        if skipped:
+            self.skip_depth += 1
+        if tag == "a":
+            self.link_depth += 1
+        self.stack.append(node)
+
+    def handle_endtag(self, tag: str) -> None:
+        """Close the matching node and anything left open inside it"""
+        tag = tag.lower()
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                while len(self.stack) > i:
+                    self._close(self.stack[-1])
+                return
+        # stray end tag without matching start tag, ignore
+
+    def handle_data(self, data: str) -> None:
+        """Record text and count it towards the current block"""
+        if self.skip_depth:
+            return
+        text = " ".join(data.split())
+        if not text:
+            return
+        self.segments.append(text)
+        n = len(text)
+        node = self.stack[-1]
+        node.chars += n
+        node.block.own_chars += n
+        node.block.own_commas += text.count(",") + text.count("、") + text.count("，")
+        if self.link_depth:
+            node.link_chars += n
+            node.block.own_link_chars += n
+        if self.word_count < LANGUAGE_SAMPLE:
+            self._count_words(text)
+
+    def _count_words(self, text: str) -> None:
+        """Collect stopword and script statistics for language detection"""
+        words = WORD_RE.findall(text.lower())
+        self.word_count += len(words)
+        hits = self.stopword_hits
+        for word in words:
+            for lang in STOPWORD_LANGUAGES.get(word, ()):
+                hits[lang] += 1
+        if not text.isascii():
+            self.script_chars["ja"] += len(KANA_RE.findall(text))
+            self.script_chars["ko"] += len(HANGUL_RE.findall(text))
+            self.script_chars["zh"] += len(HAN_RE.findall(text))
+            self.script_chars["ru"] += len(CYRILLIC_RE.findall(text))
+            self.script_chars["ar"] += len(ARABIC_RE.findall(text))
+
+    def _close(self, node: BlockNode) -> None:
+        """Pop a node, score it and roll its statistics up into the parent"""
+        self.stack.pop()
+        node.seg_end = len(self.segments)
+        if node.skipped:
+            self.skip_depth -= 1
+        if node.tag == "a":
+            self.link_depth -= 1
+        parent = node.parent
+        parent.chars += node.chars
+        parent.link_chars += node.link_chars
+        parent.tags += node.tags
+        if node.block is node and node.own_chars >= MIN_BLOCK_CHARS and not node.boilerplate:
+            link_ratio = node.own_link_chars / node.own_chars
+            block_score = (1 + node.own_commas + min(node.own_chars // 100, 3)) * (1 - link_ratio)
+            if node.tag in PARAGRAPH_TAGS:
+                # paragraph: give its score to parent and half to grandparent
+                parent.score += block_score
+                if parent.parent is not None:
+                    parent.parent.score += block_score / 2
+            else:
+                # text directly in a container: score it and give half to parent
+                node.score += block_score
+                parent.score += block_score / 2
+        if node.score > 0:
+            score = (node.score + node.weight) * (1 - node.link_density)
+            if score > self.best_score:
+                self.best_score = score
+                self.best = node
+
+    def close(self) -> None:
+        """Finish the document, closing any elements still open"""
+        super().close()
+        while len(self.stack) > 1:
+            self._close(self.stack[-1])
+        self.root.seg_end = len(self.segments)
+
+    @property
+    def language(self) -> str | None:
+        """Language detected from the text, falling back to <html lang>"""
+        scripts = self.script_chars
+        letters = max(self.word_count, 1)
+        if scripts["ja"] and scripts["ja"] * 10 >= scripts["zh"] \
+                and scripts["ja"] + scripts["zh"] >= letters:
+            return "ja"
+        for lang in ("ko", "zh", "ru", "ar"):
+            if scripts[lang] >= letters:
+                return lang
+        lang, hits = max(self.stopword_hits.items(), key=lambda item: item[1])
+        if hits >= 3:
+            return lang
+        return self.declared_language
+
+    def result(self) -> ExtractedContent:
+        """Get the text of the best scoring block, or all visible text if none scored"""
+        node = self.best or self.root
+        text = " ".join(self.segments[node.seg_start:node.seg_end])
+        return ExtractedContent(text, language=self.language,
+                                declared_language=self.declared_language,
+                                tag=node.tag, score=self.best_score)
+
+
+def extract(html: str, scorer: BlockScorer | None = None) -> ExtractedContent:
+    """Extract main content and language from HTML in a single pass
+    :param html: HTML document
+    :param scorer: optional BlockScorer to reuse, it is reset before use
+    """
+    if scorer is None:
+        scorer = BlockScorer()
+    else:
+        scorer.reset()
+    scorer.feed(html)
+    scorer.close()
+    return scorer.result()
@@ -3,8 +3,9 @@ from html.parser import HTMLParser
 
 class CupHTMLParser(HTMLParser):
     """HTML parser to extract canonical URL from HTML content"""
-    def __init__(self):
-        super().__init__()
+    def reset(self) -> None:
+        """Reset the parser so the instance can be reused for another page, called by __init__"""
+        super().reset()
         self.canonical_url = None
         self.og_url = None
         self.og_title = None
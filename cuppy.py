@@ -0,0 +1,186 @@
+import sys
+import argparse
+from cuppydb import CuppyDatabase
+
+# Subcommands import their modules lazily, so e.g. `cuppy.py robots` never loads
+# requests/bs4 and `cuppy.py search` never loads protego or openai.
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for integers >= 0"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """argparse type for integers >= 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def probability(value: str) -> float:
+    """argparse type for floats between 0 and 1"""
+    number = float(value)
+    if not 0.0 <= number <= 1.0:
+        raise argparse.ArgumentTypeError(f"must be between 0 and 1, got {value}")
+    return number
+
+
+def crawl(args) -> int:
+    """Fetch and parse the URLs in a file, store results in the database"""
+    from webpageparser import main
+    main(args.url_file, robotstxt=args.robotstxt, force=args.force, db_file=args.db,
+         workers=args.workers, budget=args.budget, min_probability=args.min_probability)
+    return 0
+
+
+def robots(args) -> int:
+    """Check robots.txt for a URL, exit code 0 if allowed and 1 if not"""
+    from robotsparser import RobotsTxtParser
+    db = CuppyDatabase(args.db)
+    db.connect()
+    try:
+        rp = RobotsTxtParser(db)
+        allowed = rp.can_fetch(args.url, args.user_agent)
+        print(f"{'Allowed' if allowed else 'Disallowed'}: {args.url} for user-agent {args.user_agent}")
+        if allowed:
+            print(f"Crawl delay: {rp.crawl_delay(args.user_agent)}")
+    finally:
+        db.disconnect()
+    return 0 if allowed else 1
+
+
+def search(args) -> int:
+    """Search stored pages by title and clean text"""
+    db = CuppyDatabase(args.db)
+    db.connect()
+    try:
+        pattern = f"%{args.query}%"
+        rows = db.fetch_data("""
+        SELECT url, title FROM urls WHERE title LIKE ? OR clean_text LIKE ?
+        ORDER BY timestamp DESC LIMIT ?;""", (pattern, pattern, args.limit))
+    finally:
+        db.disconnect()
+    for url, title in rows:
+        print(f"{url}\t{title or ''}")
+    return 0 if rows else 1
+
+
+def summarize(args) -> int:
+    """Summarize the stored clean text of a URL"""
+    db = CuppyDatabase(args.db)
+    db.connect()
+    try:
+        row = db.fetch_one("SELECT clean_text FROM urls WHERE url = ?;", (args.url,))
+    finally:
+        db.disconnect()
+    if not row or not row[0]:
+        print(f"Error: no clean text stored for {args.url}, crawl it first")
+        return 1
+    from textsummarizer import TextSummarizer
+    ts = TextSummarizer(useAzure=args.azure)
+    for summary in ts.summarize(row[0]):
+        print(summary)
+    return 0
+
+
+def export(args) -> int:
+    """Stream a table to JSONL, CSV or Parquet, optionally only rows changed since a watermark"""
+    import os
+    from cuppyexport import count_held_back, export_table, format_from_path
+    since = args.since
+    incremental = since is not None or args.watermark is not None
+    if since is None and args.watermark and os.path.exists(args.watermark):
+        with open(args.watermark, "r") as f:
+            since = f.read().strip() or None
+    db = CuppyDatabase(args.db)
+    db.connect()
+    try:
+        count, watermark = export_table(db, args.table, args.output, fmt=args.format or format_from_path(args.output),
+                                        since=since, chunk_size=args.chunk_size, incremental=incremental)
+        held_back = count_held_back(db, args.table, watermark) if watermark else 0
+    except (ValueError, ImportError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        db.disconnect()
+    print(f"Exported {count} rows from {args.table} to {args.output}"
+          + (f", changed since {since}" if since else ""))
+    if held_back:
+        print(f"Held back {held_back} rows written after {watermark}, they are exported next time")
+    if args.watermark and watermark:
+        with open(args.watermark, "w") as f:
+            f.write(watermark)
+        print(f"Watermark: {watermark}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser with one subparser per subcommand"""
+    argparser = argparse.ArgumentParser(prog="cuppy", description="Cuppy - A Content Understanding Platform in Python")
+    argparser.add_argument("--db", default="cuppy-dev.db"
+                           , help="sqlite3 database file (default: cuppy-dev.db)")
+    subparsers = argparser.add_subparsers(dest="command", required=True)
+
+    crawl_parser = subparsers.add_parser("crawl", help="Parse URLs and extract metadata and clean text")
+    crawl_parser.add_argument("url_file"
+                              , help="File containing URLs, one per line.")
+    crawl_parser.add_argument("-r", "--robotstxt", action="store_true"
+                              , help="Check robots.txt before parsing URL")
+    crawl_parser.add_argument("-f", "--force", action="store_true"
+                              , help="Force refetch of URL even if etag matches")
+    crawl_parser.add_argument("-w", "--workers", type=positive_int, default=1
+                              , help="Number of pages to fetch concurrently (default: 1)")
+    crawl_parser.add_argument("-b", "--budget", type=non_negative_int
+                              , help="Fetch at most this many URLs, most likely changed first")
+    crawl_parser.add_argument("-p", "--min-probability", type=probability, default=0.0
+                              , help="Skip URLs less likely than this to have changed (0-1)")
+    crawl_parser.set_defaults(func=crawl)
+
+    robots_parser = subparsers.add_parser("robots", help="Check if robots.txt allows fetching a URL")
+    robots_parser.add_argument("url", help="URL to check")
+    robots_parser.add_argument("-u", "--user-agent", default="*"
+                               , help="User agent to check for (default: *)")
+    robots_parser.set_defaults(func=robots)
+
+    search_parser = subparsers.add_parser("search", help="Search stored pages by title and clean text")
+    search_parser.add_argument("query", help="Text to search for")
+    search_parser.add_argument("-n", "--limit", type=int, default=20
+                               , help="Maximum number of results (default: 20)")
+    search_parser.set_defaults(func=search)
+
+    summarize_parser = subparsers.add_parser("summarize", help="Summarize the stored clean text of a URL")
+    summarize_parser.add_argument("url", help="URL to summarize, must have been crawled")
+    summarize_parser.add_argument("--azure", action="store_true"
+                                  , help="Use Azure OpenAI instead of OpenAI")
+    summarize_parser.set_defaults(func=summarize)
+
+    export_parser = subparsers.add_parser("export", help="Stream a table to JSONL, CSV or Parquet")
+    export_parser.add_argument("table", choices=["urls", "robots_txt"], help="Table to export")
+    export_parser.add_argument("output", help="Output file")
+    export_parser.add_argument("--format", choices=["jsonl", "csv", "parquet"]
+                               , help="Output format (default: from output file extension, else jsonl)")
+    export_parser.add_argument("--since"
+                               , help="Only export urls rows with a timestamp after this, e.g. '2024-01-01 00:00:00'")
+    export_parser.add_argument("--watermark"
+                               , help="File with the timestamp of the last export, read as --since and updated after export")
+    export_parser.add_argument("--chunk-size", type=positive_int, default=1000
+                               , help="Rows read and written at a time (default: 1000)")
+    export_parser.set_defaults(func=export)
+    return argparser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Console entry point
+    :param argv: command line arguments, defaults to sys.argv[1:]
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
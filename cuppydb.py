@@ -37,6 +37,10 @@ class CuppyDatabase:
             print(f"Error fetching data: {e}")
             return []
         
+    def fetch_columns(self, table):
+        """Get (name, declared type) of the columns of a table"""
+        return [(row[1], row[2]) for row in self.fetch_data(f"PRAGMA table_info({table})")]
+
     def fetch_one(self, query, data=()):
         try:
             cursor = self.connection.cursor()
@@ -65,7 +69,7 @@ if __name__ == "__main__":
         canonical_url_html TEXT,
         og_url TEXT,
         og_title TEXT,
-        description TEXT, clean_text TEXT)
+        description TEXT, clean_text TEXT, language TEXT)
     """
     db.execute_query(create_urls_table_query)
 
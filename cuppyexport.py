@@ -0,0 +1,177 @@
+import csv
+import json
+from collections.abc import Iterator
+
+from cuppydb import CuppyDatabase
+
+# Exportable tables and the column used as watermark for incremental exports
+EXPORT_TABLES = {"urls": "timestamp", "robots_txt": None}
+FORMATS = ("jsonl", "csv", "parquet")
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def table_columns(db: CuppyDatabase, table: str, incremental: bool = False) -> list[tuple[str, str]]:
+    """Check that a table can be exported and get its (name, declared type) columns"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table {table}, expected one of {', '.join(EXPORT_TABLES)}")
+    if incremental and EXPORT_TABLES[table] is None:
+        raise ValueError(f"Table {table} has no watermark column, incremental export is not possible")
+    columns = db.fetch_columns(table)
+    if not columns:
+        raise ValueError(f"Table {table} does not exist in {db.db_file}")
+    return columns
+
+
+def export_upper_bound(db: CuppyDatabase, table: str) -> str | None:
+    """Latest watermark column value that can no longer change within its second
+
+    Read once at the start of an incremental export. Rows written while the export
+    runs get a later value and are left for the next export, and since CURRENT_TIMESTAMP
+    has one-second resolution, the current second is excluded as it is not complete yet.
+    """
+    watermark_column = EXPORT_TABLES[table]
+    if watermark_column is None:
+        return None
+    row = db.fetch_one(f"SELECT MIN(MAX({watermark_column}), datetime('now', '-1 second')) FROM {table}")
+    return row[0] if row else None
+
+
+def count_held_back(db: CuppyDatabase, table: str, watermark: str) -> int:
+    """Number of rows with a watermark column value later than watermark, left for the next export"""
+    row = db.fetch_one(f"SELECT COUNT(*) FROM {table} WHERE {EXPORT_TABLES[table]} > ?", (watermark,))
+    return row[0] if row else 0
+
+
+def iter_chunks(db: CuppyDatabase, table: str, since: str | None = None, until: str | None = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[tuple]]:
+    """Read a table in chunks with keyset pagination on rowid
+
+    Every chunk is a separate short query, so memory stays flat and no read
+    transaction is held open while a chunk is being written out.
+    :param db: connected CuppyDatabase
+    :param table: one of EXPORT_TABLES
+    :param since: only rows with a watermark column value later than this
+    :param until: only rows with a watermark column value up to and including this
+    :param chunk_size: number of rows per chunk, at least 1
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    columns = ", ".join(name for name, _ in table_columns(db, table, since is not None or until is not None))
+    query = f"SELECT rowid, {columns} FROM {table} WHERE rowid > ?"
+    bounds = ()
+    if since is not None:
+        query += f" AND {EXPORT_TABLES[table]} > ?"
+        bounds += (since,)
+    if until is not None:
+        query += f" AND {EXPORT_TABLES[table]} <= ?"
+        bounds += (until,)
+    query += " ORDER BY rowid LIMIT ?"
+    last_rowid = 0
+    while True:
+        data = (last_rowid,) + bounds + (chunk_size,)
+        rows = db.fetch_data(query, data)
+        if not rows:
+            return
+        last_rowid = rows[-1][0]
+        yield [row[1:] for row in rows]
+        if len(rows) < chunk_size:
+            return
+
+
+class JsonlWriter:
+    """Write rows as JSON lines, one object per row"""
+    def __init__(self, path: str, columns: list[tuple[str, str]]):
+        self.names = [name for name, _ in columns]
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: list[tuple]) -> None:
+        self.file.writelines(json.dumps(dict(zip(self.names, row)), ensure_ascii=False) + "\n"
+                             for row in rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CsvWriter:
+    """Write rows as CSV with a header row"""
+    def __init__(self, path: str, columns: list[tuple[str, str]]):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows: list[tuple]) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter:
+    """Write rows as Parquet, one row group per chunk (requires pyarrow)"""
+    def __init__(self, path: str, columns: list[tuple[str, str]]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+        self.pa = pa
+        # sqlite3 declared types to arrow types, DATETIME is stored as text by sqlite3
+        self.schema = pa.schema([(name, pa.int64() if "INT" in (decl or "").upper() else pa.string())
+                                 for name, decl in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows: list[tuple]) -> None:
+        arrays = [self.pa.array([row[i] for row in rows], type=field.type)
+                  for i, field in enumerate(self.schema)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def export_table(db: CuppyDatabase, table: str, path: str, fmt: str = "jsonl",
+                 since: str | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 incremental: bool = False) -> tuple[int, str | None]:
+    """Stream a table to a file
+
+    Full exports include every row. Incremental exports (since given or incremental
+    set, e.g. for the first run) only include rows up to export_upper_bound.
+    :param db: connected CuppyDatabase
+    :param table: one of EXPORT_TABLES
+    :param path: output file
+    :param fmt: one of FORMATS
+    :param since: only export rows changed after this watermark, see iter_chunks
+    :param chunk_size: number of rows read and written at a time, at least 1
+    :param incremental: bound the export and return a watermark even if since is None
+    :return: number of rows exported and the new watermark (None for full exports)
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format {fmt}, expected one of {', '.join(FORMATS)}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    incremental = incremental or since is not None
+    columns = table_columns(db, table, incremental)
+    until = export_upper_bound(db, table) if incremental else None
+    count = 0
+    chunks = iter_chunks(db, table, since=since, until=until, chunk_size=chunk_size)
+    writer = WRITERS[fmt](path, columns)
+    try:
+        for rows in chunks:
+            writer.write(rows)
+            count += len(rows)
+    finally:
+        writer.close()
+    if not incremental:
+        return count, None
+    if until is None or (since is not None and since > until):
+        return count, since
+    return count, until
+
+
+def format_from_path(path: str) -> str:
+    """Guess the export format from the file extension, defaults to jsonl"""
+    extension = path.rsplit(".", 1)[-1].lower()
+    return extension if extension in FORMATS else "jsonl"
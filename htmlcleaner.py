@@ -1,5 +1,4 @@
-import requests
-from bs4 import BeautifulSoup
+from blockscorer import extract, BlockScorer, ExtractedContent
 
 removables = ["nav", 
                       "header", 
@@ -40,22 +39,29 @@ class HTMLCleaner:
 
     @staticmethod
     def stripped(content, custom_removables=[]):
+        from bs4 import BeautifulSoup # lazy, only needed when block scoring finds nothing
         removables.extend(custom_removables)
         soup = BeautifulSoup(content, 'lxml')
         HTMLCleaner.remove_all_nav(soup, removables)
         return(" ".join(" ".join(t.strip().split()) \
                         for t in soup.stripped_strings if t.strip() != ""))
     
+    @staticmethod
+    def extract(content, scorer: BlockScorer | None = None) -> ExtractedContent:
+        """Get main content block and page language from HTML content in a single pass
+        :param scorer: optional BlockScorer to reuse across pages
+        """
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", errors="replace")
+        return extract(content, scorer=scorer)
+
     def clean_text(content, custom_removables=[]):
         """Get clean text from HTML content"""
-        soup = BeautifulSoup(content, 'lxml')
-        text = ""
-        main = HTMLCleaner.main_content(soup) # get main content as specified by main tag
-        print(f"Main text length: {len(main)}")
-        if main: 
-            text = main
-        else:
-            text = HTMLCleaner.stripped(content) # get stripped text, irrespective of main tag
+        result = HTMLCleaner.extract(content) # best scoring block by text/link density
+        text = result.text
+        print(f"Main text length: {len(text)} ({result.tag}, language: {result.language})")
+        if not text:
+            text = HTMLCleaner.stripped(content) # get stripped text, irrespective of scoring
             print(f"Stripped text length: {len(text)}")
         print(f"Clean text length in bytes: {len(text.encode('utf-8'))}")
         return text
@@ -63,6 +69,8 @@ class HTMLCleaner:
         
 
 if __name__ == "__main__":
+    import requests
+    from bs4 import BeautifulSoup
     
     #url = "https://www.cnn.com/2023/12/25/travel/blizzard-nebraska-south-dakota-colorado-travel-delays/index.html"
     #url = "https://scrapeops.io/blog/the-state-of-web-scraping-2022/"
@@ -0,0 +1,195 @@
+import math
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from cuppydb import CuppyDatabase
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S" # same format as sqlite3 CURRENT_TIMESTAMP (UTC)
+DEFAULT_CHANGE_RATE = 1 / (7 * 24 * 3600) # changes per second assumed for pages seen once: weekly
+MIN_CHANGE_RATE = 1 / (90 * 24 * 3600) # floor for pages never seen to change, so they are revisited rarely, not never
+FAILURE_BACKOFF = 3600 # seconds before retrying a URL after its first failure, doubled per consecutive failure
+MAX_FAILURE_BACKOFF = 30 * 24 * 3600 # longest wait before retrying a failing URL
+
+
+def utcnow() -> datetime:
+    """Current UTC time without microseconds"""
+    return datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+
+class ChangeHistory:
+    """Per-URL change history
+
+    Records for every fetch whether the page was not modified (304), fetched but
+    unchanged (same content hash) or changed, and counts consecutive failed fetches
+    (errors, network failures, robots.txt disallowed). Stored in the url_history table.
+    """
+    def __init__(self, db: CuppyDatabase):
+        """
+        Initialize the ChangeHistory object.
+
+        Parameters:
+        - db: CuppyDatabase object representing the SQLite database connection.
+        """
+        self.db = db
+        self.db.execute_query("""CREATE TABLE IF NOT EXISTS url_history
+            (url TEXT PRIMARY KEY,
+             first_fetched DATETIME NOT NULL,
+             last_fetched DATETIME NOT NULL,
+             last_changed DATETIME NOT NULL,
+             fetch_count INTEGER NOT NULL DEFAULT 1,
+             not_modified_count INTEGER NOT NULL DEFAULT 0,
+             unchanged_count INTEGER NOT NULL DEFAULT 0,
+             changed_count INTEGER NOT NULL DEFAULT 0,
+             content_hash TEXT,
+             failure_count INTEGER NOT NULL DEFAULT 0,
+             last_failed DATETIME)""")
+        # url_history tables created before failures were recorded
+        columns = [name for name, _ in self.db.fetch_columns("url_history")]
+        if "failure_count" not in columns:
+            self.db.execute_query("ALTER TABLE url_history ADD COLUMN failure_count INTEGER NOT NULL DEFAULT 0")
+        if "last_failed" not in columns:
+            self.db.execute_query("ALTER TABLE url_history ADD COLUMN last_failed DATETIME")
+
+    def get(self, url):
+        """Get change history of a URL
+
+        Returns:
+        - Row (url, first_fetched, last_fetched, last_changed, fetch_count, not_modified_count,
+          unchanged_count, changed_count, content_hash, failure_count, last_failed) or None if
+          the URL was never fetched. fetch_count is 0 if every fetch so far failed.
+        """
+        return self.db.fetch_one("SELECT * FROM url_history WHERE url = ?", (url,))
+
+    def all(self) -> dict:
+        """Get change history of all URLs, keyed by URL"""
+        return {row[0]: row for row in self.db.fetch_data("SELECT * FROM url_history")}
+
+    def record(self, url, status_code, content_hash=None, fetched_at=None):
+        """Record the outcome of a fetch
+
+        Parameters:
+        - url: The URL that was fetched.
+        - status_code: HTTP status code, anything but 200 and 304 (including None for
+          failed or disallowed requests) is recorded as a failure.
+        - content_hash: Hash of the page content, used to detect changes on 200.
+        - fetched_at: Time of the fetch (UTC), defaults to now.
+        """
+        now = (fetched_at or utcnow()).strftime(TIMESTAMP_FORMAT)
+        row = self.get(url)
+        if status_code not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            if row:
+                self.db.execute_query("""UPDATE url_history SET last_failed = ?,
+                    failure_count = failure_count + 1 WHERE url = ?""", (now, url))
+            else:
+                self.db.execute_query("""INSERT INTO url_history
+                    (url, first_fetched, last_fetched, last_changed, fetch_count, failure_count, last_failed)
+                    VALUES (?, ?, ?, ?, 0, 1, ?)""", (url, now, now, now, now))
+        elif not row or row[4] == 0:
+            # first successful fetch; a 304 means it was cached before history was kept,
+            # so the content hash is not known yet
+            not_modified = 1 if status_code == HTTPStatus.NOT_MODIFIED else 0
+            self.db.execute_query("""INSERT INTO url_history
+                (url, first_fetched, last_fetched, last_changed, not_modified_count, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET first_fetched = ?, last_fetched = ?, last_changed = ?,
+                    fetch_count = 1, not_modified_count = ?, content_hash = ?,
+                    failure_count = 0""",
+                (url, now, now, now, not_modified, content_hash, now, now, now, not_modified, content_hash))
+        elif status_code == HTTPStatus.NOT_MODIFIED:
+            self.db.execute_query("""UPDATE url_history SET last_fetched = ?,
+                fetch_count = fetch_count + 1, not_modified_count = not_modified_count + 1,
+                failure_count = 0 WHERE url = ?""", (now, url))
+        elif content_hash == row[8]:
+            self.db.execute_query("""UPDATE url_history SET last_fetched = ?,
+                fetch_count = fetch_count + 1, unchanged_count = unchanged_count + 1,
+                failure_count = 0 WHERE url = ?""", (now, url))
+        else:
+            # includes a 200 after a 304 with no hash stored yet: the server says it changed
+            self.db.execute_query("""UPDATE url_history SET last_fetched = ?, last_changed = ?,
+                fetch_count = fetch_count + 1, changed_count = changed_count + 1,
+                content_hash = ?, failure_count = 0 WHERE url = ?""", (now, now, content_hash, url))
+
+
+class RecrawlScheduler:
+    """Orders URLs for recrawling by the probability that they changed since the last fetch
+
+    A page's change rate is estimated from its history with the Cho & Garcia-Molina
+    estimator for regularly accessed pages, r = -log((n - X + 0.5) / (n + 0.5)) / I,
+    with n revisits, X detected changes and I the mean interval between fetches.
+    Assuming changes follow a Poisson process, the probability that the page changed
+    t seconds after the last fetch is 1 - exp(-r * t). The estimate is 0 for pages
+    never seen to change, so r is floored at MIN_CHANGE_RATE.
+
+    URLs whose last fetches failed are skipped until an exponential back-off has
+    passed and are then ranked after all URLs whose last fetch did not fail.
+    """
+    def __init__(self, history: ChangeHistory, min_probability: float = 0.0, now=None):
+        """
+        Initialize the RecrawlScheduler object.
+
+        Parameters:
+        - history: ChangeHistory to estimate change rates from.
+        - min_probability: URLs less likely than this to have changed are skipped.
+        - now: Time (UTC) to schedule for, defaults to now.
+        """
+        if not 0.0 <= min_probability <= 1.0:
+            raise ValueError(f"min_probability must be between 0 and 1, got {min_probability}")
+        self.history = history
+        self.min_probability = min_probability
+        self.now = now or utcnow()
+
+    @staticmethod
+    def change_rate(row) -> float:
+        """Estimated changes per second for a url_history row"""
+        first_fetched = datetime.strptime(row[1], TIMESTAMP_FORMAT)
+        last_fetched = datetime.strptime(row[2], TIMESTAMP_FORMAT)
+        revisits = row[4] - 1
+        changes = row[7]
+        span = (last_fetched - first_fetched).total_seconds()
+        if revisits < 1 or span <= 0:
+            return DEFAULT_CHANGE_RATE
+        interval = span / revisits
+        rate = -math.log((revisits - changes + 0.5) / (revisits + 0.5)) / interval
+        return max(rate, MIN_CHANGE_RATE)
+
+    def backed_off(self, row) -> bool:
+        """Whether a URL failed recently, waiting FAILURE_BACKOFF doubled per consecutive failure"""
+        if row is None or not row[9]:
+            return False
+        backoff = min(FAILURE_BACKOFF * 2 ** (row[9] - 1), MAX_FAILURE_BACKOFF)
+        return (self.now - datetime.strptime(row[10], TIMESTAMP_FORMAT)).total_seconds() < backoff
+
+    def change_probability(self, row) -> float:
+        """Probability that the page changed since it was last fetched, 1.0 if never fetched"""
+        if row is None or row[4] == 0:
+            return 1.0
+        elapsed = (self.now - datetime.strptime(row[2], TIMESTAMP_FORMAT)).total_seconds()
+        return 1.0 - math.exp(-RecrawlScheduler.change_rate(row) * max(elapsed, 0))
+
+    def schedule(self, urls: list[str], budget: int | None = None) -> list[str]:
+        """Order URLs by change probability, most likely changed first
+
+        Parameters:
+        - urls: URLs to schedule.
+        - budget: Maximum number of URLs to return, None for no limit.
+
+        Returns:
+        - URLs to fetch, unseen URLs first and failing URLs last, without URLs below
+          min_probability or backed off after a failure.
+        """
+        if budget is not None and budget < 0:
+            raise ValueError(f"budget must not be negative, got {budget}")
+        history = self.history.all()
+        scored = []
+        for url in dict.fromkeys(urls): # drop duplicates, keep order
+            row = history.get(url)
+            if self.backed_off(row):
+                continue
+            probability = self.change_probability(row)
+            if probability >= self.min_probability:
+                healthy = row is None or row[9] == 0
+                scored.append((healthy, probability, url))
+        scored.sort(key=lambda item: item[:2], reverse=True) # stable, ties keep file order
+        if budget is not None:
+            scored = scored[:budget]
+        return [url for _, _, url in scored]
@@ -1,9 +1,7 @@
 from urllib.parse import urlparse
-import urllib.request
 from contextlib import closing
 
 from cuppydb import CuppyDatabase
-from protego import Protego
 
 
 class RobotsTxtCache:
@@ -95,6 +93,7 @@ class RobotsTxtParser:
         Returns:
         - The content of the robots.txt file if found, None otherwise.
         """
+        import urllib.request # lazy, pulls in http.client and ssl
         try:
             with closing(urllib.request.urlopen(url)) as f:
                 raw = f.read()
@@ -116,6 +115,7 @@ class RobotsTxtParser:
         Returns:
         - True if the URL is allowed to be fetched, False otherwise.
         """
+        from protego import Protego # lazy, keeps import of this module cheap
         can_fetch = False
         robots_url = robots_location(url)
         robots_from_cache = self.read_from_cache(robots_url)
@@ -0,0 +1,50 @@
+"""Benchmark export throughput and peak memory for each format
+
+Run with: python -m tests.bench_export
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from cuppydb import CuppyDatabase
+from cuppyexport import export_table
+
+CLEAN_TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 100  # ~5.7 KB per row
+
+
+def make_db(path: str, rows: int) -> CuppyDatabase:
+    """Database with a urls table of the given size"""
+    db = CuppyDatabase(path)
+    db.connect()
+    db.connection.execute("""CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL UNIQUE, etag TEXT, status_code INTEGER NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, title TEXT, canonical_url_header TEXT,
+        canonical_url_html TEXT, og_url TEXT, og_title TEXT, description TEXT, clean_text TEXT)""")
+    db.connection.executemany("INSERT INTO urls (url, status_code, title, clean_text) VALUES (?, 200, ?, ?)",
+                              ((f"https://example.com/{i}", f"Page {i}", CLEAN_TEXT) for i in range(rows)))
+    db.connection.commit()
+    return db
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (10_000, 50_000):
+            db = make_db(os.path.join(tmp, f"bench-{rows}.db"), rows)
+            for fmt in ("jsonl", "csv", "parquet"):
+                path = os.path.join(tmp, f"urls-{rows}.{fmt}")
+                tracemalloc.start()
+                start = time.perf_counter()
+                try:
+                    count, _ = export_table(db, "urls", path, fmt=fmt) # full export, all rows
+                except ImportError as e:
+                    tracemalloc.stop()
+                    print(f"{rows:>6} rows, {fmt:>7}: skipped ({e})")
+                    continue
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                size = os.path.getsize(path) / 1e6
+                print(f"{count:>6} rows, {fmt:>7}: {count / elapsed:>9.0f} rows/s, "
+                      f"{size / elapsed:6.1f} MB/s written, peak memory {peak / 1e6:5.1f} MB")
+            db.disconnect()
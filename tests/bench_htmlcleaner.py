@@ -0,0 +1,44 @@
+"""Benchmark extraction speed of the block scorer (and BeautifulSoup, if installed)
+
+Run with: python -m tests.bench_htmlcleaner
+"""
+import time
+
+from blockscorer import BlockScorer, extract
+
+PARAGRAPH = ("<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+             "tempor <a href='#'>incididunt</a> ut labore et dolore magna aliqua.</p>\n")
+NAV = "<li><a href='/section'>Section link</a></li>\n"
+
+
+def make_page(paragraphs: int) -> str:
+    """Synthetic page with navigation, a sidebar and an article of the given size"""
+    return ("<html lang='en'><head><title>Bench</title><script>var x = 1;</script></head><body>"
+            f"<nav><ul>{NAV * 50}</ul></nav>"
+            f"<div class='sidebar'><ul>{NAV * 50}</ul></div>"
+            f"<div class='wrapper'><article>{PARAGRAPH * paragraphs}</article></div>"
+            "<footer>Footer</footer></body></html>")
+
+
+def bench(func, html: str, repeat: int) -> float:
+    """Best throughput in MB/s over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        best = min(best, time.perf_counter() - start)
+    return len(html.encode("utf-8")) / best / 1e6
+
+
+if __name__ == "__main__":
+    scorer = BlockScorer()
+    for paragraphs in (10, 100, 1000, 10000):
+        html = make_page(paragraphs)
+        line = f"{paragraphs:>6} paragraphs, {len(html) / 1024:>8.1f} KiB: " \
+               f"block scorer {bench(lambda h: extract(h, scorer=scorer), html, 5):6.2f} MB/s"
+        try:
+            from htmlcleaner import HTMLCleaner
+            line += f", bs4 stripped {bench(HTMLCleaner.stripped, html, 3):6.2f} MB/s"
+        except ImportError:
+            pass
+        print(line)
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from blockscorer import BlockScorer, extract
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+with open(os.path.join(FIXTURES, "labels.json"), encoding="utf-8") as f:
+    LABELS = json.load(f)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", sorted(LABELS))
+def test_fixture_quality(name):
+    label = LABELS[name]
+    result = extract(read_fixture(name))
+    assert result.language == label["language"]
+    for snippet in label["contains"]:
+        assert snippet in result.text
+    for snippet in label["excludes"]:
+        assert snippet not in result.text
+
+
+def test_scorer_reuse():
+    scorer = BlockScorer()
+    first = extract(read_fixture("news_de.html"), scorer=scorer)
+    second = extract(read_fixture("blog_en.html"), scorer=scorer)
+    assert first.language == "de"
+    assert second.language == "en"
+    assert "Radwege" not in second.text
+
+
+def test_declared_language_fallback():
+    result = extract('<html lang="sv-SE"><body><p>Hej</p></body></html>')
+    assert result.declared_language == "sv"
+    assert result.language == "sv"
+    assert result.text == "Hej"
+
+
+def test_unclosed_and_stray_tags():
+    html = ("<body><div class='content'><p>First paragraph, with enough text to be scored here."
+            "<p>Second paragraph, also long enough to count as a block.</span></div>")
+    result = extract(html)
+    assert result.tag == "div"
+    assert result.text == ("First paragraph, with enough text to be scored here. "
+                           "Second paragraph, also long enough to count as a block.")
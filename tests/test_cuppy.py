@@ -0,0 +1,45 @@
+import pytest
+
+from cuppy import build_parser, main
+from cuppydb import CuppyDatabase
+
+
+def make_db(path):
+    db = CuppyDatabase(str(path))
+    db.connect()
+    db.execute_query("""CREATE TABLE urls (url TEXT NOT NULL UNIQUE, title TEXT,
+                        clean_text TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)""")
+    db.execute_query("INSERT INTO urls (url, title, clean_text) VALUES (?, ?, ?)",
+                     ("https://example.com/coffee", "Coffee", "Brewing coffee at home"))
+    db.disconnect()
+
+
+def test_subcommands():
+    parser = build_parser()
+    args = parser.parse_args(["--db", "test.db", "crawl", "-r", "urls.txt"])
+    assert (args.command, args.db, args.url_file, args.robotstxt) == ("crawl", "test.db", "urls.txt", True)
+    args = parser.parse_args(["robots", "https://example.com/"])
+    assert (args.command, args.user_agent) == ("robots", "*")
+
+
+@pytest.mark.parametrize("option", [["--budget", "-1"], ["--min-probability", "1.5"],
+                                    ["--min-probability", "-0.1"], ["--workers", "0"],
+                                    ["--workers", "-5"]])
+def test_crawl_rejects_invalid_options(option):
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["crawl", "urls.txt"] + option)
+
+
+def test_search(tmp_path, capsys):
+    db_file = tmp_path / "cuppy.db"
+    make_db(db_file)
+    assert main(["--db", str(db_file), "search", "coffee"]) == 0
+    assert "https://example.com/coffee\tCoffee" in capsys.readouterr().out
+    assert main(["--db", str(db_file), "search", "tea"]) == 1
+
+
+def test_summarize_requires_crawl(tmp_path, capsys):
+    db_file = tmp_path / "cuppy.db"
+    make_db(db_file)
+    assert main(["--db", str(db_file), "summarize", "https://example.com/tea"]) == 1
+    assert "crawl it first" in capsys.readouterr().out
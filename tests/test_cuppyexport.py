@@ -0,0 +1,137 @@
+import csv
+import json
+
+import pytest
+
+from cuppy import main
+from cuppydb import CuppyDatabase
+from cuppyexport import WRITERS, JsonlWriter, export_table, format_from_path, iter_chunks
+
+
+def make_db(path, rows=5):
+    db = CuppyDatabase(str(path))
+    db.connect()
+    db.execute_query("""CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL UNIQUE, status_code INTEGER NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, title TEXT, clean_text TEXT)""")
+    db.execute_query("CREATE TABLE robots_txt (url TEXT PRIMARY KEY, content TEXT)")
+    for i in range(rows):
+        db.execute_query("INSERT INTO urls (url, status_code, timestamp, title, clean_text) VALUES (?, ?, ?, ?, ?)",
+                         (f"https://example.com/{i}", 200, f"2024-01-0{i + 1} 00:00:00", f"Page {i}", "Käse, \"quoted\"\nline"))
+    db.execute_query("INSERT INTO robots_txt VALUES (?, ?)", ("https://example.com/robots.txt", "User-agent: *"))
+    return db
+
+
+def test_iter_chunks(tmp_path):
+    db = make_db(tmp_path / "cuppy.db")
+    chunks = list(iter_chunks(db, "urls", chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert [row[1] for c in chunks for row in c] == [f"https://example.com/{i}" for i in range(5)]
+    chunks = list(iter_chunks(db, "urls", since="2024-01-03 00:00:00", chunk_size=2))
+    assert [row[1] for c in chunks for row in c] == ["https://example.com/3", "https://example.com/4"]
+    with pytest.raises(ValueError):
+        list(iter_chunks(db, "robots_txt", since="2024-01-03 00:00:00"))
+    with pytest.raises(ValueError):
+        list(iter_chunks(db, "urls", chunk_size=-1))
+    with pytest.raises(ValueError):
+        export_table(db, "urls", str(tmp_path / "urls.jsonl"), chunk_size=0)
+    db.disconnect()
+
+
+def test_export_jsonl_and_csv(tmp_path):
+    db = make_db(tmp_path / "cuppy.db")
+    count, watermark = export_table(db, "urls", str(tmp_path / "urls.jsonl"), chunk_size=2)
+    assert (count, watermark) == (5, None)
+    with open(tmp_path / "urls.jsonl", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows[0] == {"id": 1, "url": "https://example.com/0", "status_code": 200,
+                       "timestamp": "2024-01-01 00:00:00", "title": "Page 0", "clean_text": "Käse, \"quoted\"\nline"}
+
+    count, _ = export_table(db, "robots_txt", str(tmp_path / "robots.csv"), fmt="csv")
+    with open(tmp_path / "robots.csv", encoding="utf-8", newline="") as f:
+        assert list(csv.reader(f)) == [["url", "content"], ["https://example.com/robots.txt", "User-agent: *"]]
+    db.disconnect()
+
+
+def test_export_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    db = make_db(tmp_path / "cuppy.db")
+    export_table(db, "urls", str(tmp_path / "urls.parquet"), fmt="parquet", chunk_size=2)
+    table = pq.read_table(tmp_path / "urls.parquet")
+    assert table.num_rows == 5
+    assert table.column("title").to_pylist() == [f"Page {i}" for i in range(5)]
+    db.disconnect()
+
+
+def test_format_from_path():
+    assert format_from_path("out.parquet") == "parquet"
+    assert format_from_path("out.CSV") == "csv"
+    assert format_from_path("out.json") == "jsonl"
+
+
+def test_cli_incremental_export(tmp_path):
+    db = make_db(tmp_path / "cuppy.db")
+    db.disconnect()
+    watermark = tmp_path / "watermark.txt"
+    args = ["--db", str(tmp_path / "cuppy.db"), "export", "urls", str(tmp_path / "urls.jsonl"),
+            "--watermark", str(watermark)]
+    assert main(args) == 0
+    assert watermark.read_text() == "2024-01-05 00:00:00"
+
+    db = CuppyDatabase(str(tmp_path / "cuppy.db"))
+    db.connect()
+    db.execute_query("UPDATE urls SET timestamp = ? WHERE id = 2", ("2024-02-01 00:00:00",))
+    db.disconnect()
+    assert main(args) == 0
+    with open(tmp_path / "urls.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == [2]
+    assert watermark.read_text() == "2024-02-01 00:00:00"
+
+
+def test_export_rows_updated_between_chunks(tmp_path, monkeypatch):
+    db = make_db(tmp_path / "cuppy.db")
+
+    class CrawlingWriter(JsonlWriter):
+        """Updates an exported and a not yet exported row after the first chunk"""
+        def write(self, rows):
+            super().write(rows)
+            if rows[0][0] == 1:
+                db.execute_query("UPDATE urls SET timestamp = ? WHERE id IN (1, 4)", ("2024-01-10 00:00:00",))
+
+    monkeypatch.setitem(WRITERS, "jsonl", CrawlingWriter)
+    count, watermark = export_table(db, "urls", str(tmp_path / "first.jsonl"), chunk_size=2, incremental=True)
+    assert (count, watermark) == (4, "2024-01-05 00:00:00")
+
+    monkeypatch.setitem(WRITERS, "jsonl", JsonlWriter)
+    count, watermark = export_table(db, "urls", str(tmp_path / "second.jsonl"), since=watermark)
+    with open(tmp_path / "second.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == [1, 4]
+    assert watermark == "2024-01-10 00:00:00"
+    db.disconnect()
+
+
+def test_incremental_export_excludes_current_second(tmp_path, capsys):
+    db = make_db(tmp_path / "cuppy.db")
+    db.execute_query("UPDATE urls SET timestamp = CURRENT_TIMESTAMP WHERE id = 5")
+    count, watermark = export_table(db, "urls", str(tmp_path / "urls.jsonl"), incremental=True)
+    assert count == 4
+    # row 5 can still be joined by rows written later in the same second, export it next time
+    assert watermark < db.fetch_one("SELECT timestamp FROM urls WHERE id = 5")[0]
+    db.disconnect()
+    assert main(["--db", str(tmp_path / "cuppy.db"), "export", "urls", str(tmp_path / "urls.jsonl"),
+                 "--since", "2024-01-01 00:00:00"]) == 0
+    assert "Held back 1 rows" in capsys.readouterr().out
+
+
+def test_full_export_is_unbounded(tmp_path):
+    db = make_db(tmp_path / "cuppy.db")
+    db.execute_query("UPDATE urls SET timestamp = CURRENT_TIMESTAMP WHERE id = 5")
+    db.execute_query("UPDATE urls SET timestamp = NULL WHERE id = 4")
+    count, watermark = export_table(db, "urls", str(tmp_path / "urls.jsonl"))
+    assert (count, watermark) == (5, None)
+    db.disconnect()
+
+
+def test_cli_rejects_invalid_chunk_size(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["export", "urls", str(tmp_path / "urls.jsonl"), "--chunk-size", "-1"])
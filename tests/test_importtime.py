@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budget in microseconds, per module
+IMPORT_BUDGET_US = 100_000
+
+# Modules that must only be loaded by the subcommands that need them
+LAZY_MODULES = ("requests", "bs4", "lxml", "protego", "openai",
+                "concurrent.futures", "logging", "urllib.request")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Run statement with -X importtime, return cumulative import time (us) per module"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+MODULES = ["cuppy", "webpageparser", "robotsparser", "htmlcleaner"]
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_no_eager_heavy_imports(module):
+    times = import_times(f"import {module}")
+    assert module in times
+    for lazy in LAZY_MODULES:
+        assert lazy not in times
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_time_budget(module):
+    # best of a few runs, so a busy machine does not make the test flaky
+    best = min(import_times(f"import {module}")[module] for _ in range(3))
+    assert best < IMPORT_BUDGET_US
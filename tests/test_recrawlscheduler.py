@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cuppydb import CuppyDatabase
+from recrawlscheduler import MIN_CHANGE_RATE, ChangeHistory, RecrawlScheduler
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def history():
+    db = CuppyDatabase(":memory:")
+    db.connect()
+    yield ChangeHistory(db)
+    db.disconnect()
+
+
+def crawl_daily(history, url, days, changed):
+    """Fetch url once a day, with changed(day) telling whether the content changed"""
+    content = 0
+    history.record(url, 200, content_hash=str(content), fetched_at=START)
+    for day in range(1, days + 1):
+        if changed(day):
+            content += 1
+        history.record(url, 200, content_hash=str(content), fetched_at=START + timedelta(days=day))
+
+
+def test_record_counts(history):
+    url = "https://example.com/"
+    history.record(url, 200, content_hash="a", fetched_at=START)
+    history.record(url, 304, fetched_at=START + timedelta(days=1))
+    history.record(url, 200, content_hash="a", fetched_at=START + timedelta(days=2))
+    history.record(url, 200, content_hash="b", fetched_at=START + timedelta(days=3))
+    history.record(url, 404, fetched_at=START + timedelta(days=4))
+    row = history.get(url)
+    assert row[1:] == ("2024-01-01 00:00:00", "2024-01-04 00:00:00", "2024-01-04 00:00:00",
+                       4, 1, 1, 1, "b", 1, "2024-01-05 00:00:00")
+
+
+def test_ok_after_not_modified_without_hash_is_a_change(history):
+    url = "https://example.com/"
+    history.record(url, 304, fetched_at=START) # cached before history was kept
+    history.record(url, 200, content_hash="a", fetched_at=START + timedelta(days=1))
+    row = history.get(url)
+    assert row[3:9] == ("2024-01-02 00:00:00", 2, 1, 0, 1, "a")
+
+
+def test_failures_are_backed_off_and_ranked_last(history):
+    crawl_daily(history, "https://example.com/about", 10, lambda day: False)
+    history.record("https://example.com/gone", 404, fetched_at=START + timedelta(days=10))
+    history.record("https://example.com/down", None, fetched_at=START + timedelta(days=10))
+    history.record("https://example.com/down", None, fetched_at=START + timedelta(days=10, hours=1))
+    assert history.get("https://example.com/gone")[4] == 0
+    urls = ["https://example.com/gone", "https://example.com/down", "https://example.com/about"]
+    # gone waits one hour, down two hours after its second failure
+    scheduler = RecrawlScheduler(history, now=START + timedelta(days=10, minutes=30))
+    assert scheduler.schedule(urls) == ["https://example.com/about"]
+    scheduler = RecrawlScheduler(history, now=START + timedelta(days=10, hours=2))
+    assert scheduler.schedule(urls) == ["https://example.com/about", "https://example.com/gone"]
+    assert scheduler.schedule(urls, budget=1) == ["https://example.com/about"]
+    scheduler = RecrawlScheduler(history, now=START + timedelta(days=10, hours=3))
+    assert scheduler.schedule(urls) == ["https://example.com/about", "https://example.com/gone",
+                                        "https://example.com/down"]
+    history.record("https://example.com/gone", 200, content_hash="a", fetched_at=START + timedelta(days=11))
+    row = history.get("https://example.com/gone")
+    assert row[1:5] == ("2024-01-12 00:00:00", "2024-01-12 00:00:00", "2024-01-12 00:00:00", 1)
+    assert row[9] == 0
+
+
+def test_change_rate(history):
+    crawl_daily(history, "https://example.com/news", 10, lambda day: True)
+    crawl_daily(history, "https://example.com/about", 10, lambda day: False)
+    crawl_daily(history, "https://example.com/blog", 10, lambda day: day % 5 == 0)
+    rates = {url: RecrawlScheduler.change_rate(row) for url, row in history.all().items()}
+    assert rates["https://example.com/about"] == MIN_CHANGE_RATE
+    assert rates["https://example.com/news"] > rates["https://example.com/blog"] > 0
+
+
+def test_schedule_order_budget_and_threshold(history):
+    crawl_daily(history, "https://example.com/news", 10, lambda day: True)
+    crawl_daily(history, "https://example.com/about", 10, lambda day: False)
+    crawl_daily(history, "https://example.com/blog", 10, lambda day: day % 5 == 0)
+    urls = ["https://example.com/about", "https://example.com/blog",
+            "https://example.com/news", "https://example.com/new", "https://example.com/news"]
+    scheduler = RecrawlScheduler(history, now=START + timedelta(days=11))
+    assert scheduler.schedule(urls) == ["https://example.com/new", "https://example.com/news",
+                                        "https://example.com/blog", "https://example.com/about"]
+    assert scheduler.schedule(urls, budget=2) == ["https://example.com/new", "https://example.com/news"]
+    scheduler = RecrawlScheduler(history, min_probability=0.1, now=START + timedelta(days=11))
+    assert "https://example.com/about" not in scheduler.schedule(urls)
+
+
+def test_static_page_is_eventually_rescheduled(history):
+    url = "https://example.com/about"
+    crawl_daily(history, url, 10, lambda day: False)
+    assert RecrawlScheduler(history, min_probability=0.1, now=START + timedelta(days=11)).schedule([url]) == []
+    assert RecrawlScheduler(history, min_probability=0.1, now=START + timedelta(days=60)).schedule([url]) == [url]
+
+
+def test_invalid_budget_and_probability(history):
+    with pytest.raises(ValueError):
+        RecrawlScheduler(history).schedule(["https://example.com/"], budget=-1)
+    with pytest.raises(ValueError):
+        RecrawlScheduler(history, min_probability=1.5)
+    with pytest.raises(ValueError):
+        RecrawlScheduler(history, min_probability=-0.1)
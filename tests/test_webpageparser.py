@@ -0,0 +1,89 @@
+import pytest
+
+from blockscorer import BlockScorer
+from cuphtmlparser import CupHTMLParser
+from cuppydb import CuppyDatabase
+from webpageparser import PageResult, WebpageParser, canonical_from_headers, parse_page
+
+HTML = b"""<html><head><title>Coffee</title>
+<link rel="canonical" href="https://example.com/coffee">
+<meta property="og:title" content="All about coffee">
+<meta name="description" content="How to brew coffee"></head>
+<body><nav><a href="/">Home</a></nav>
+<article><p>Good coffee starts with fresh beans, and the grind is the most important variable.</p>
+<p>Water that is just off the boil extracts the flavour of the beans evenly and quickly.</p></article>
+</body></html>"""
+
+
+class Response:
+    """Minimal stand-in for a requests.Response"""
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+def test_page_result_is_immutable():
+    page = PageResult("https://example.com/", status_code=200)
+    with pytest.raises(AttributeError):
+        page.title = "changed"
+    with pytest.raises(AttributeError):
+        del page.url
+    assert not hasattr(page, "__dict__")
+
+
+def test_canonical_from_headers():
+    headers = {"link": '<https://example.com/style.css>; rel="preload", <https://example.com/a>; rel="canonical"'}
+    assert canonical_from_headers(headers) == "https://example.com/a"
+    assert canonical_from_headers({}) is None
+
+
+def test_parse_page_reuses_parser():
+    parser = CupHTMLParser()
+    scorer = BlockScorer()
+    page = parse_page("https://example.com/coffee", Response(200, HTML, {"etag": "abc"}), html_parser=parser,
+                      scorer=scorer)
+    assert (page.status_code, page.etag, page.title) == (200, "abc", "Coffee")
+    assert page.canonical_url_from_html == "https://example.com/coffee"
+    assert page.og_title == "All about coffee"
+    assert page.description == "How to brew coffee"
+    assert page.language == "en"
+    assert page.clean_text.startswith("Good coffee starts")
+    assert "Home" not in page.clean_text
+
+    page = parse_page("https://example.com/empty", Response(200, b"<html><body><p>Hi</p></body></html>"),
+                      html_parser=parser, scorer=scorer)
+    assert page.title is None
+    assert page.clean_text == "Hi"
+    assert page.canonical_url_from_html is None
+
+
+def test_parse_page_not_modified_and_errors():
+    page = parse_page("https://example.com/", Response(304, headers={"etag": "abc"}))
+    assert (page.status_code, page.etag, page.clean_text) == (304, "abc", None)
+    assert parse_page("https://example.com/", Response(404)).status_code == 404
+    assert parse_page("https://example.com/", None).status_code is None
+
+
+def test_write_results_to_database(tmp_path):
+    db = CuppyDatabase(str(tmp_path / "cuppy.db"))
+    db.connect()
+    # urls table as created before the language column existed
+    db.execute_query("""CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL UNIQUE, etag TEXT, status_code INTEGER NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, title TEXT, canonical_url_header TEXT,
+        canonical_url_html TEXT, og_url TEXT, og_title TEXT, description TEXT, clean_text TEXT)""")
+    db.disconnect()
+    cup = WebpageParser([], db_file=str(tmp_path / "cuppy.db"))
+    results = iter([
+        PageResult("https://example.com/a", status_code=200, etag="1", title="A"),
+        PageResult("https://example.com/b", status_code=304, etag="2"),
+        PageResult("https://example.com/a", status_code=200, etag="3", title="A2", language="en"),
+        PageResult("https://example.com/c", status_code=500),
+    ])
+    cup.write_results_to_database(results)
+    assert cup.success_count == 2
+    assert cup.db.fetch_data("SELECT url, etag, title, language FROM urls") == [("https://example.com/a", "3", "A2", "en")]
+    assert cup.get_etag_from_cache("https://example.com/a") == "3"
+    assert cup.history.get("https://example.com/c")[9] == 1 # failure recorded for back-off
+    cup.db.disconnect()
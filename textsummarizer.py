@@ -1,5 +1,4 @@
 import textwrap
-import requests
 from htmlcleaner import HTMLCleaner
 
 class TextSummarizer:
@@ -57,6 +56,7 @@ class TextSummarizer:
         return summaries
     
 if __name__ == "__main__":
+    import requests
     # Example usage
     ts = TextSummarizer()
     text = requests.get("https://en.wikipedia.org/wiki/Bothell%2C_Washington").text
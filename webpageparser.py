@@ -1,203 +1,294 @@
 import os, sys
 import argparse
+from collections import deque
+from collections.abc import Iterable, Iterator
+from http import HTTPStatus
 from urllib.parse import urlparse
-import requests
+from blockscorer import BlockScorer
 from cuphtmlparser import CupHTMLParser
 from cuppydb import CuppyDatabase
-from robotsparser import RobotsTxtParser
-from htmlcleaner import HTMLCleaner
+from recrawlscheduler import ChangeHistory, RecrawlScheduler
+
+# requests, robotsparser (protego) and htmlcleaner are imported where they are used,
+# so importing this module stays cheap for runs that never fetch or clean a page
+
+DEFAULT_USER_AGENT = "CUPPy/0.1"
+
+
+class PageResult:
+    """Immutable record of a fetched and parsed page"""
+    __slots__ = ("url", "status_code", "etag", "title", "og_url", "og_title",
+                 "canonical_url_from_headers", "canonical_url_from_html",
+                 "description", "clean_text", "language", "content_hash")
+
+    def __init__(self, url: str, status_code: int | None = None, etag: str | None = None,
+                 title: str | None = None, og_url: str | None = None, og_title: str | None = None,
+                 canonical_url_from_headers: str | None = None,
+                 canonical_url_from_html: str | None = None,
+                 description: str | None = None, clean_text: str | None = None,
+                 language: str | None = None, content_hash: str | None = None):
+        init = object.__setattr__ # regular assignment is blocked, see __setattr__
+        init(self, "url", url)
+        init(self, "status_code", status_code)
+        init(self, "etag", etag)
+        init(self, "title", title)
+        init(self, "og_url", og_url)
+        init(self, "og_title", og_title)
+        init(self, "canonical_url_from_headers", canonical_url_from_headers)
+        init(self, "canonical_url_from_html", canonical_url_from_html)
+        init(self, "description", description)
+        init(self, "clean_text", clean_text)
+        init(self, "language", language)
+        init(self, "content_hash", content_hash)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"PageResult is immutable, cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"PageResult is immutable, cannot delete {name}")
+
+    def __repr__(self) -> str:
+        return f"PageResult(url={self.url!r}, status_code={self.status_code!r}, title={self.title!r})"
+
+
+def fetch_page(url: str, cached_etag: str | None = None, user_agent: str = DEFAULT_USER_AGENT):
+    """Get webpage, returns the response or None if the request failed
+    :param url: URL to fetch
+    :param cached_etag: etag from the cache, sent as If-None-Match
+    :param user_agent: user agent to send
+    """
+    import requests
+    print(f"Getting webpage: {url}")
+    headers = {'user-agent': user_agent
+               ,'Accept' : 'text/html'}
+    if cached_etag:
+        headers['If-None-Match'] = cached_etag
+        print(f"Using cached etag: {cached_etag}")
+    try:
+        return requests.get(url, headers=headers)
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def canonical_from_headers(headers) -> str | None:
+    """Extract canonical URL from HTTP Link headers"""
+    canonical_url = None
+    link_header = headers.get("link") if headers else None
+    if link_header:
+        links = link_header.split(",") # can be multiple links
+        for link in links:
+            if link.find("canonical") > -1:
+                canonical_url = link.split(";")[0].strip().strip("<>")
+    return canonical_url
+
+
+def parse_page(url: str, response, html_parser: CupHTMLParser | None = None,
+               force: bool = False, scorer: BlockScorer | None = None) -> PageResult:
+    """Parse a fetched page into a PageResult
+    :param url: URL of the page
+    :param response: response from fetch_page, None if the request failed
+    :param html_parser: CupHTMLParser to reuse, it is reset before use
+    :param force: whether the page was refetched ignoring the cached etag
+    :param scorer: BlockScorer to reuse for main content extraction, it is reset before use
+    """
+    if response is None:
+        return PageResult(url)
+    status_code = response.status_code
+    etag = response.headers.get("etag")
+    if status_code == HTTPStatus.NOT_MODIFIED and not force:
+        print(f"Not modified: status code {status_code}")
+        return PageResult(url, status_code=status_code, etag=etag)
+    if status_code != HTTPStatus.OK:
+        print(f"Error: status code {status_code}")
+        return PageResult(url, status_code=status_code)
+    print(f"Success: status code {status_code}")
+    if not response.content:
+        print(f"Error: no HTML content")
+        return PageResult(url, status_code=status_code, etag=etag,
+                          canonical_url_from_headers=canonical_from_headers(response.headers))
+
+    import hashlib
+    from htmlcleaner import HTMLCleaner
+    html = response.content.decode("utf-8", errors="replace")
+    if html_parser is None:
+        html_parser = CupHTMLParser()
+    else:
+        html_parser.reset()
+    html_parser.feed(html)
+    extracted = HTMLCleaner.extract(html, scorer=scorer)
+    clean_text = extracted.text or HTMLCleaner.stripped(html)
+    print(f"Clean text length: {len(clean_text)}, language: {extracted.language}")
+    return PageResult(url,
+                      status_code=status_code,
+                      etag=etag,
+                      title=html_parser.title,
+                      og_url=html_parser.og_url,
+                      og_title=html_parser.og_title,
+                      canonical_url_from_headers=canonical_from_headers(response.headers),
+                      canonical_url_from_html=html_parser.canonical_url,
+                      description=html_parser.description,
+                      clean_text=clean_text,
+                      language=extracted.language,
+                      content_hash=hashlib.sha1(clean_text.encode("utf-8")).hexdigest())
 
 
 class WebpageParser:
     """Class to parse a list of URLs and extract metadata and mores from headers and/or HTML content"""
-    def __init__(self, urls: list[str], robotstxt: bool = False, force: bool = False):
+    def __init__(self, urls: list[str], robotstxt: bool = False, force: bool = False,
+                 db_file: str = "cuppy-dev.db", workers: int = 1,
+                 budget: int | None = None, min_probability: float = 0.0):
 
         self.urls = urls
-        self.url = None
-        self.etag = None
-        self.status_code = None
-        self.html_parser = CupHTMLParser()
-        self.content = None
-        self.headers = None
-        self.title = None
-        self.og_url = None
-        self.og_title = None
-        self.canonical_url_from_headers = None
-        self.canonical_url_from_html = None
-        self.description = None
-        self.clean_text = None
-        self.db = CuppyDatabase("cuppy-dev.db")
+        self.html_parser = CupHTMLParser() # reused for every page
+        self.scorer = BlockScorer() # reused for every page
+        self.db = CuppyDatabase(db_file)
         self.db.connect()
+        self.history = ChangeHistory(self.db)
+        self.add_language_column()
         self.success_count = 0
-        self.run_id = None
         self.robotstxt = robotstxt
         self.force = force
-        self.user_agent = os.environ.get("USER_AGENT", "CUPPy/0.1")
-
-    def reset(self):
-        """Reset all attributes to None"""
-        self.etag = None
-        self.content = None
-        self.headers = None
-        self.status_code = None
-        self.title = None
-        self.canonical_url_from_headers = None
-        self.canonical_url_from_html = None
-        self.og_title = None
-        self.og_url = None
-        self.description = None
-        self.clean_text = None
-        self.html_parser = CupHTMLParser()
-        
-  
+        self.workers = workers
+        self.budget = budget
+        self.min_probability = min_probability
+        self.user_agent = os.environ.get("USER_AGENT", DEFAULT_USER_AGENT)
+        self._robots_parser = None
+
     def parse(self):
-        """Parse all URLs in list
+        """Parse all URLs in list, or the ones scheduled for recrawl if a budget is set
         """
-        for url in self.urls:
-            self.url = url
-            self.parse_url()
-            self.write_results_to_database()
-            self.reset() # reset attributes for next URL
-    
-    def get_etag_from_cache(self):
+        urls = self.urls
+        if self.budget is not None or self.min_probability > 0:
+            urls = self.schedule()
+        self.write_results_to_database(self.results(urls))
+
+    def schedule(self) -> list[str]:
+        """Order URLs in list by estimated change probability, within budget"""
+        scheduler = RecrawlScheduler(self.history, min_probability=self.min_probability)
+        urls = scheduler.schedule(self.urls, budget=self.budget)
+        print(f"Scheduled {len(urls)} of {len(self.urls)} URLs for recrawl")
+        return urls
+
+    def results(self, urls: list[str] | None = None) -> Iterator[PageResult]:
+        """Fetch and parse all URLs in list, one PageResult per URL in list order
+
+        With more than one worker, pages are fetched concurrently while parsing
+        stays on this thread, so the HTML parser and database connection are not shared.
+        """
+        for url, response in self.fetch_all(urls if urls is not None else self.urls):
+            yield parse_page(url, response, html_parser=self.html_parser, force=self.force,
+                             scorer=self.scorer)
+
+    def fetch_all(self, urls: list[str]) -> Iterator[tuple]:
+        """Fetch all URLs in list, yields (url, response) with at most 2 * workers pages in flight
+
+        The response is None for URLs disallowed by robots.txt and for failed requests.
+        """
+        if self.workers <= 1:
+            for url, allowed, cached_etag in self.fetch_jobs(urls):
+                yield url, fetch_page(url, cached_etag, self.user_agent) if allowed else None
+            return
+        from concurrent.futures import ThreadPoolExecutor # lazy, pulls in threading and logging
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for url, allowed, cached_etag in self.fetch_jobs(urls):
+                future = executor.submit(fetch_page, url, cached_etag, self.user_agent) if allowed else None
+                pending.append((url, future))
+                if len(pending) >= 2 * self.workers:
+                    url, future = pending.popleft()
+                    yield url, future.result() if future else None
+            while pending:
+                url, future = pending.popleft()
+                yield url, future.result() if future else None
+
+    def fetch_jobs(self, urls: list[str]) -> Iterator[tuple]:
+        """Check robots.txt and look up cached etags, yields (url, allowed, cached_etag)"""
+        for url in urls:
+            if not self.can_fetch(url):
+                yield url, False, None
+            elif self.force:
+                print("Forcing refetch, not looking for cached etag (if any)")
+                yield url, True, None
+            else:
+                yield url, True, self.get_etag_from_cache(url)
+
+    def can_fetch(self, url: str) -> bool:
+        """Check robots.txt for URL, if enabled"""
+        if not self.robotstxt:
+            return True
+        if self._robots_parser is None:
+            from robotsparser import RobotsTxtParser
+            self._robots_parser = RobotsTxtParser(self.db)
+        if self._robots_parser.can_fetch(url, '*'):
+            print(f"Success: robots.txt allows {url}")
+            return True
+        print(f"Error: robots.txt disallows {url}")
+        return False
+
+    def add_language_column(self):
+        """Add the language column to urls tables created before it existed"""
+        columns = [name for name, _ in self.db.fetch_columns("urls")]
+        if columns and "language" not in columns:
+            self.db.execute_query("ALTER TABLE urls ADD COLUMN language TEXT")
+
+    def get_etag_from_cache(self, url: str) -> str | None:
         """Get etag from the database/cache""" 
         select_data_query = """
         SELECT etag FROM urls WHERE url = ?;"""
-        row = self.db.fetch_one(select_data_query, (self.url,))
+        row = self.db.fetch_one(select_data_query, (url,))
         if row:
             return row[0]
         else:
             return None
 
-    def parse_url(self):
-        """Parse a single URL"""
-        self.get_webpage()
-        if self.status_code == requests.codes.ok:
-            self.get_canonical_from_headers()
-            self.get_metadata_from_html()
-            self.get_clean_text()
-         
-    def get_webpage(self):
-        """Get webpage and store status code, content and headers"""
-        print(f"Getting webpage: {self.url}")
-        
-        headers = {'user-agent': self.user_agent
-                   ,'Accept' : 'text/html'}
+    def write_results_to_database(self, results: Iterable[PageResult]):
+        """Write results to database
+        :param results: PageResults, consumed one at a time
+        """
+        insert_data_query = """
+        INSERT INTO urls (url, etag, status_code, timestamp, title, canonical_url_header
+        , canonical_url_html, og_url, og_title, description, clean_text, language)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET 
+            etag = ?,
+            status_code = ?,
+            timestamp = CURRENT_TIMESTAMP,
+            title = ?,
+            canonical_url_header = ?,
+            canonical_url_html = ?,
+            og_url = ?,
+            og_title = ?,
+            description = ?,
+            clean_text = ?,
+            language = ?
+        WHERE url = ?;
+        """
+        for page in results:
+            if page.status_code == HTTPStatus.OK: #for now
+                values = (
+                    page.etag,
+                    page.status_code,
+                    page.title,
+                    page.canonical_url_from_headers,
+                    page.canonical_url_from_html,
+                    page.og_url,
+                    page.og_title,
+                    page.description,
+                    page.clean_text,
+                    page.language,
+                )
+                self.db.execute_query(insert_data_query, (page.url,) + values + values + (page.url,))
+                self.history.record(page.url, page.status_code, page.content_hash)
+                self.success_count += 1
+            elif page.status_code == HTTPStatus.NOT_MODIFIED:
+                self.history.record(page.url, page.status_code)
+                print(f"Not modified so not updating db. Status code {page.status_code}")
         
-        if not self.force:
-            cached_etag = self.get_etag_from_cache()
-            if cached_etag:
-                headers['If-None-Match'] = cached_etag
-                print(f"Using cached etag: {cached_etag}")
-        else:
-            print("Forcing refetch, not looking for cached etag (if any)")
-                    
-        if self.robotstxt:
-            rp = RobotsTxtParser(self.db)
-            if rp.can_fetch(self.url, '*'):
-                print(f"Success: robots.txt allows {self.url}")               
             else:
-                print(f"Error: robots.txt disallows {self.url}")
-                self.reset()
-                return
-        try:
-            r = requests.get(self.url, headers=headers)
-            self.etag = r.headers.get("etag")
-            self.status_code = r.status_code
-            if self.status_code == requests.codes.ok:
-                print(f"Success: status code {self.status_code}")
-                self.content = r.content
-                self.headers = r.headers
-            elif not self.force and self.status_code == requests.codes.not_modified:
-                print(f"Not modified: status code {self.status_code}")
-            else:
-                print(f"Error: status code {self.status_code}")
-                self.reset()
-        except Exception as e:
-            print(f"Error: {e}")
-            self.reset()
-
-    def get_canonical_from_headers(self):
-        """Extract canonical URL from HTTP headers"""
-        link_header = self.headers.get("link")
-        if link_header:
-            links = link_header.split(",") # can be multiple links
-            for link in links:
-                if link.find("canonical") > -1:
-                    self.canonical_url_from_headers = link.split(";")[0].strip("<>")
-                   
-    def get_metadata_from_html(self):
-        """Extract meta data from HTML content"""
-        if self.content:
-            html = self.content.decode("utf-8")
-            self.html_parser.feed(html)
-            self.canonical_url_from_html = self.html_parser.canonical_url
-            self.og_url = self.html_parser.og_url    
-            self.title = self.html_parser.title
-            self.og_url = self.html_parser.og_url
-            self.description = self.html_parser.description
-           
-        else:
-            print(f"Error: no HTML content")
-
-    def get_clean_text(self):
-        """Get clean text from HTML content"""
-        if self.content:
-            html = self.content.decode("utf-8")
-            self.clean_text = HTMLCleaner.clean_text(html)
-        else:
-            print(f"Error: no HTML content")
-    
-    def write_results_to_database(self):
-        """Write results to database"""
-        if self.status_code == requests.codes.ok: #for now
-            insert_data_query = """
-            INSERT INTO urls (url, etag, status_code, timestamp, title, canonical_url_header
-            , canonical_url_html, og_url, og_title, description, clean_text)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(url) DO UPDATE SET 
-                etag = ?,
-                status_code = ?,
-                timestamp = CURRENT_TIMESTAMP,
-                title = ?,
-                canonical_url_header = ?,
-                canonical_url_html = ?,
-                og_url = ?,
-                og_title = ?,
-                description = ?,
-                clean_text = ?
-            WHERE url = ?;
-            """
-            data = (
-                self.url,
-                self.etag,
-                self.status_code,
-                self.title,
-                self.canonical_url_from_headers,
-                self.canonical_url_from_html,
-                self.og_url,
-                self.og_title,
-                self.description,
-                self.clean_text,
-                self.etag,
-                self.status_code,
-                self.title,
-                self.canonical_url_from_headers,
-                self.canonical_url_from_html,
-                self.og_url,
-                self.og_title,
-                self.description,
-                self.clean_text,
-                self.url
-            )
-            self.db.execute_query(insert_data_query, data)
-        elif self.status_code == requests.codes.not_modified:
-            print(f"Not modified so not updating db. Status code {self.status_code}")
-    
-        else:
-            # to do error table 
-            print(f"Error: status code {self.status_code}")
-        
+                # to do error table 
+                self.history.record(page.url, page.status_code) # failure, backed off by the scheduler
+                print(f"Error: status code {page.status_code}")
         
         
 def get_urls_from_file(filename: str) -> list[str]:
@@ -215,18 +306,29 @@ def is_valid_url(url: str) -> bool:
         return False
     
     
-def main(url_file: str, robotstxt: bool = False, force: bool = False):
+def main(url_file: str, robotstxt: bool = False, force: bool = False,
+         db_file: str = "cuppy-dev.db", workers: int = 1,
+         budget: int | None = None, min_probability: float = 0.0):
     """Main function
     :param url_file: file containing URLs, one per line
+    :param db_file: sqlite3 database file to store results in
+    :param workers: number of pages fetched concurrently
+    :param budget: maximum number of URLs to fetch, most likely changed first
+    :param min_probability: skip URLs less likely than this to have changed
     """
     urls = get_urls_from_file(url_file)
     cup  = WebpageParser(urls
                         ,robotstxt=robotstxt
-                        ,force=force)
+                        ,force=force
+                        ,db_file=db_file
+                        ,workers=workers
+                        ,budget=budget
+                        ,min_probability=min_probability)
     cup.parse()
     
 
 if __name__ == "__main__":
+    from cuppy import non_negative_int, positive_int, probability
 
     argparser = argparse.ArgumentParser(description="Parse URLs and extract canonical URL from headers and/or HTML content")
     argparser.add_argument("url_file"
@@ -235,5 +337,12 @@ if __name__ == "__main__":
                            , help="Check robots.txt before parsing URL")
     argparser.add_argument("-f", "--force", action="store_true"
                            , help="Force refetch of URL even if etag matches")
+    argparser.add_argument("-w", "--workers", type=positive_int, default=1
+                           , help="Number of pages to fetch concurrently (default: 1)")
+    argparser.add_argument("-b", "--budget", type=non_negative_int
+                           , help="Fetch at most this many URLs, most likely changed first")
+    argparser.add_argument("-p", "--min-probability", type=probability, default=0.0
+                           , help="Skip URLs less likely than this to have changed (0-1)")
     args = argparser.parse_args()
-    sys.exit(main(args.url_file, robotstxt=args.robotstxt, force=args.force))
\ No newline at end of file
+    sys.exit(main(args.url_file, robotstxt=args.robotstxt, force=args.force, workers=args.workers
+                  , budget=args.budget, min_probability=args.min_probability))
\ No newline at end of file